@@ -1,11 +1,69 @@
-import csv
+import math
 import os
-import uuid
-from typing import List, Dict
-from banking_system_components.transaction import Transaction
+import sys
+from array import array
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Tuple, Union
+from banking_system_components.formatting import format_money
+from banking_system_components.transaction import (
+    TRANSACTION_TYPES, TYPE_CODES, Transaction, TransactionType,
+    format_transaction_id, next_transaction_seq)
+
+if TYPE_CHECKING:
+    from banking_system_components.bank import Bank
+
+ACCOUNT_TYPES = frozenset(("Checking", "Savings"))
+# Number of account IDs drawn from os.urandom at a time.
+ACCOUNT_ID_BATCH = 256
+
+_account_id_pool: List[str] = []
+
+def new_account_id() -> str:
+    """
+    Return a new random account ID of 32 hex digits.
+
+    IDs are taken from a pool that is refilled with ACCOUNT_ID_BATCH IDs
+    from a single os.urandom call whenever it runs out.
+    """
+    if not _account_id_pool:
+        data = os.urandom(16 * ACCOUNT_ID_BATCH).hex()
+        _account_id_pool.extend(data[i:i + 32] for i in range(0, len(data), 32))
+    return _account_id_pool.pop()
+
+def to_cents(amount: float) -> int:
+    """
+    Convert an amount of money to a whole number of cents.
+
+    Raises:
+        ValueError: If the amount is infinite, not a number, or too large to
+            convert to cents.
+    """
+    cents = amount * 100
+    if not math.isfinite(cents):
+        raise ValueError("Amount must be a finite number.")
+    return round(cents)
+
+def _type_code(transaction_type: Union[str, TransactionType]) -> Optional[TransactionType]:
+    """Return the code of a transaction type given by name or code, or None if unknown."""
+    if isinstance(transaction_type, TransactionType):
+        return transaction_type
+    return TYPE_CODES.get(transaction_type)
 
 class Account:
-    """Represents a bank account with balance and transaction history."""
+    """
+    Represents a bank account with balance and transaction history.
+
+    The holder's details (account_id, first_name, last_name, age, state, job
+    and account_type) are readable attributes, but after construction they
+    may only be changed through update_info. get_details caches their
+    formatted text and update_info is what clears that cache, so assigning
+    one of these attributes directly would leave get_details stale.
+    """
+
+    __slots__ = (
+        "account_id", "first_name", "last_name", "age", "state", "job",
+        "account_type", "balance_cents", "_txn_types", "_txn_amounts",
+        "_txn_targets", "_txn_seqs", "_txn_index", "_bank", "_details",
+    )
 
     def __init__(
         self,
@@ -15,7 +73,8 @@ class Account:
         state: str,
         job: str,
         account_type: str = "Checking",
-        initial_balance: float = 0.0
+        initial_balance: float = 0.0,
+        account_id: Optional[str] = None
     ) -> None:
         """
         Initialize a bank account.
@@ -28,19 +87,44 @@ class Account:
             job (str): The job title of the account holder.
             account_type (str): The type of account (Checking or Savings).
             initial_balance (float): The initial account balance (default: 0.0).
+            account_id (str, optional): The ID of an existing account being
+                restored; a new ID is generated when omitted.
         """
-        if account_type not in ["Checking", "Savings"]:
+        if account_type not in ACCOUNT_TYPES:
             raise ValueError(
                 "Invalid account type. Must be 'Checking' or 'Savings'.")
-        self.account_id = str(uuid.uuid4())
+        self.account_id = account_id or new_account_id()
         self.first_name = first_name
         self.last_name = last_name
         self.age = age
-        self.state = state
-        self.job = job
-        self.account_type = account_type
-        self.balance = initial_balance
-        self.transactions: List[Transaction] = []
+        # Account types, states and jobs repeat across many accounts, so
+        # every account shares one interned copy of each value.
+        self.state = sys.intern(state)
+        self.job = sys.intern(job)
+        self.account_type = sys.intern(account_type)
+        # The balance is kept in whole cents so repeated updates stay exact.
+        self.balance_cents = to_cents(initial_balance)
+        # Transaction history is kept as parallel columns (one entry per
+        # transaction) rather than a list of Transaction objects.
+        self._txn_types = array("B")
+        self._txn_amounts = array("d")
+        self._txn_targets: List[Optional[str]] = []
+        self._txn_seqs = array("Q")
+        # Positions of each type's transactions in the columns above.
+        self._txn_index: Dict[TransactionType, array] = {
+            code: array("I") for code in TransactionType}
+        self._bank: Optional['Bank'] = None
+        # Formatted details other than the balance, built by get_details.
+        self._details: Optional[str] = None
+
+    @property
+    def balance(self) -> float:
+        """The account balance in dollars."""
+        return self.balance_cents / 100
+
+    @balance.setter
+    def balance(self, value: float) -> None:
+        self.balance_cents = to_cents(value)
 
     def update_info(self, first_name: str = None, last_name: str = None, age: int = None, state: str = None, job: str = None) -> None:
         """
@@ -60,126 +144,191 @@ class Account:
         if age is not None:
             self.age = age
         if state is not None:
-            self.state = state
+            self.state = sys.intern(state)
         if job is not None:
-            self.job = job
-        self.export_balance_update()
+            self.job = sys.intern(job)
+        self._details = None
+        if self._bank is not None:
+            self._bank.mark_details_changed()
 
-    def deposit(self, amount: float) -> None:
+    def deposit(self, amount: float) -> float:
         """
         Deposit money into the account.
 
         Args:
-            amount (float): The amount to deposit.
+            amount (float): The amount to deposit, rounded to the nearest cent.
+
+        Returns:
+            float: The amount deposited, after rounding.
+
+        Raises:
+            ValueError: If the amount is non-positive or not a finite number.
         """
-        if amount <= 0:
+        cents = to_cents(amount)
+        if cents <= 0:
             raise ValueError("Deposit amount must be greater than zero.")
-        self.balance += amount
-        self.transactions.append(Transaction("Deposit", amount))
-        self.export_balance_update()
+        self.balance_cents += cents
+        amount = cents / 100
+        self._record_transaction(TransactionType.DEPOSIT, amount)
+        if self._bank is not None:
+            self._bank.mark_dirty(self)
+        return amount
 
-    def withdraw(self, amount: float) -> None:
+    def withdraw(self, amount: float) -> float:
         """
         Withdraw money from the account.
 
         Args:
-            amount (float): The amount to withdraw.
+            amount (float): The amount to withdraw, rounded to the nearest cent.
+
+        Returns:
+            float: The amount withdrawn, after rounding.
 
         Raises:
-            ValueError: If the amount exceeds the balance or is non-positive.
+            ValueError: If the amount exceeds the balance, is non-positive or
+                is not a finite number.
         """
-        if amount <= 0:
-            raise ValueError("Withdrawal amount must be greater than zero.")
-        if amount > self.balance:
+        cents = to_cents(amount)
+        if not 0 < cents <= self.balance_cents:
+            if cents <= 0:
+                raise ValueError("Withdrawal amount must be greater than zero.")
             raise ValueError("Insufficient funds.")
-        self.balance -= amount
-        self.transactions.append(Transaction("Withdrawal", amount))
-        self.export_balance_update()
+        self.balance_cents -= cents
+        amount = cents / 100
+        self._record_transaction(TransactionType.WITHDRAWAL, amount)
+        if self._bank is not None:
+            self._bank.mark_dirty(self)
+        return amount
 
-    def transfer(self, target_account: 'Account', amount: float) -> None:
+    def transfer(self, target_account: 'Account', amount: float) -> float:
         """
         Transfer money to another account.
 
         Args:
             target_account (Account): The target account for the transfer.
-            amount (float): The amount to transfer.
+            amount (float): The amount to transfer, rounded to the nearest cent.
+
+        Returns:
+            float: The amount transferred, after rounding.
 
         Raises:
-            ValueError: If the transfer amount exceeds the balance or is non-positive.
+            ValueError: If the transfer amount exceeds the balance, is
+                non-positive or is not a finite number.
         """
-        if amount <= 0:
-            raise ValueError("Transfer amount must be greater than zero.")
-        if amount > self.balance:
+        cents = to_cents(amount)
+        if not 0 < cents <= self.balance_cents:
+            if cents <= 0:
+                raise ValueError("Transfer amount must be greater than zero.")
             raise ValueError("Insufficient funds for transfer.")
-        self.balance -= amount
-        target_account.balance += amount
-        self.transactions.append(Transaction(
-            "Transfer Out", amount, target_account.account_id))
-        target_account.transactions.append(
-            Transaction("Transfer In", amount, self.account_id))
-        self.export_balance_update()
-        target_account.export_balance_update()
+        self.balance_cents -= cents
+        target_account.balance_cents += cents
+        amount = cents / 100
+        self._record_transaction(
+            TransactionType.TRANSFER_OUT, amount, target_account.account_id)
+        target_account._record_transaction(
+            TransactionType.TRANSFER_IN, amount, self.account_id)
+        if self._bank is not None and self._bank is target_account._bank:
+            self._bank.mark_dirty(self, target_account)
+        else:
+            for account in (self, target_account):
+                if account._bank is not None:
+                    account._bank.mark_dirty(account)
+        return amount
+
+    @property
+    def transaction_count(self) -> int:
+        """The number of transactions on the account."""
+        return len(self._txn_seqs)
+
+    @property
+    def transactions(self) -> List[Transaction]:
+        """All transactions on the account, oldest first."""
+        return [self._transaction_at(i) for i in range(len(self._txn_seqs))]
 
-    def filter_transactions(self, transaction_type: str) -> List[Transaction]:
+    def _record_transaction(self, type_code: TransactionType, amount: float, target_account: Optional[str] = None) -> None:
+        """Append a transaction to the history columns and the bank's transaction log."""
+        seq = next_transaction_seq()
+        self._txn_index[type_code].append(len(self._txn_types))
+        self._txn_types.append(type_code)
+        self._txn_amounts.append(amount)
+        self._txn_targets.append(target_account)
+        self._txn_seqs.append(seq)
+        if self._bank is not None:
+            self._bank.log_transaction(self.account_id, type_code, amount, target_account, seq)
+
+    def _transaction_at(self, index: int) -> Transaction:
+        """Build a Transaction object from the history columns at an index."""
+        return Transaction(
+            TRANSACTION_TYPES[self._txn_types[index]],
+            self._txn_amounts[index],
+            self._txn_targets[index],
+            format_transaction_id(self._txn_seqs[index]),
+        )
+
+    def filter_transactions(self, transaction_type: Union[str, TransactionType]) -> List[Transaction]:
         """
         Filter transactions by type.
 
         Args:
-            transaction_type (str): The type of transaction to filter.
+            transaction_type (str or TransactionType): The type of transaction
+                to filter, either by name (e.g. "Deposit") or by type code.
 
         Returns:
             list: A list of transactions matching the given type.
         """
-        return [t for t in self.transactions if t.transaction_type == transaction_type]
+        code = _type_code(transaction_type)
+        if code is None:
+            return []
+        return [self._transaction_at(i) for i in self._txn_index[code]]
+
+    def get_transaction_history(self, transaction_type: Union[str, TransactionType, None] = None) -> Iterator[Dict]:
+        """
+        Retrieve transactions in dictionary format.
+
+        Dictionaries are built lazily as the result is iterated, straight from
+        the history columns; wrap it in list() when the whole history is
+        needed at once.
+
+        Args:
+            transaction_type (str or TransactionType, optional): Only include
+                transactions of this type, by name or by type code.
+
+        Returns:
+            iterator: Dictionaries representing the transactions, oldest first.
+        """
+        if transaction_type is None:
+            return (
+                {"type": TRANSACTION_TYPES[t], "amount": amount,
+                 "target_account": target, "transaction_id": format_transaction_id(seq)}
+                for t, amount, target, seq in zip(
+                    self._txn_types, self._txn_amounts, self._txn_targets, self._txn_seqs)
+            )
+        code = _type_code(transaction_type)
+        if code is None:
+            return iter(())
+        name = TRANSACTION_TYPES[code]
+        return (
+            {"type": name, "amount": self._txn_amounts[i],
+             "target_account": self._txn_targets[i],
+             "transaction_id": format_transaction_id(self._txn_seqs[i])}
+            for i in self._txn_index[code]
+        )
 
-    def get_transaction_history(self) -> List[Dict]:
+    def get_transaction_rows(self) -> Iterator[Tuple]:
         """
-        Retrieve all transactions in dictionary format.
+        Retrieve all transactions as rows for a CSV export.
+
+        Each row is a (type, amount, target_account, transaction_id) tuple,
+        with an empty target for deposits and withdrawals.
 
         Returns:
-            list: A list of dictionaries representing all transactions.
-        """
-        return [t.to_dict() for t in self.transactions]
-
-    def export_balance_update(self) -> None:
-        """
-        Export the account balance to the CSV file after any balance update.
-        """
-        fieldnames = [
-            "account_id", "first_name", "last_name", "age",
-            "state", "job", "account_type", "balance"
-        ]
-
-        if not os.path.exists("accounts_dataset.csv"):
-            with open("accounts_dataset.csv", "w", newline="") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-
-        with open("accounts_dataset.csv", "r", newline="") as csvfile:
-            reader = list(csv.DictReader(csvfile))
-
-        with open("accounts_dataset.csv", "w", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            updated = False
-            for row in reader:
-                if row["account_id"] == self.account_id:
-                    row["balance"] = f"{self.balance:.2f}"
-                    updated = True
-                writer.writerow(row)
-
-            if not updated:
-                writer.writerow({
-                    "account_id": self.account_id,
-                    "first_name": self.first_name,
-                    "last_name": self.last_name,
-                    "age": self.age,
-                    "state": self.state,
-                    "job": self.job,
-                    "account_type": self.account_type,
-                    "balance": f"{self.balance:.2f}",
-                })
+            iterator: Tuples representing all transactions, oldest first.
+        """
+        return (
+            (TRANSACTION_TYPES[t], amount, target or "", format_transaction_id(seq))
+            for t, amount, target, seq in zip(
+                self._txn_types, self._txn_amounts, self._txn_targets, self._txn_seqs)
+        )
 
     def delete_balance_csv(self) -> None:
         """Deletes the accounts CSV file. Important for cleanup after testing"""
@@ -189,13 +338,20 @@ class Account:
             raise FileNotFoundError("Accounts CSV file not found.")
 
     def get_details(self) -> str:
-        """Return a formatted string with account details."""
-        return (
-            f"Account ID: {self.account_id}\n"
-            f"Account Holder: {self.first_name} {self.last_name}\n"
-            f"Age: {self.age}\n"
-            f"State: {self.state}\n"
-            f"Job: {self.job}\n"
-            f"Account Type: {self.account_type}\n"
-            f"Balance: ${self.balance:.2f}"
-        )
+        """
+        Return a formatted string with account details.
+
+        Everything but the balance only changes through update_info (see the
+        class docstring), so that part is formatted once and reused until
+        update_info clears it.
+        """
+        if self._details is None:
+            self._details = (
+                f"Account ID: {self.account_id}\n"
+                f"Account Holder: {self.first_name} {self.last_name}\n"
+                f"Age: {self.age}\n"
+                f"State: {self.state}\n"
+                f"Job: {self.job}\n"
+                f"Account Type: {self.account_type}\n"
+            )
+        return f"{self._details}Balance: ${format_money(self.balance)}"
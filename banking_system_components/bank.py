@@ -1,8 +1,45 @@
 import csv
 import os
 import random
-from typing import Dict
+import shutil
+from itertools import accumulate, islice
+from typing import BinaryIO, Callable, Dict, List, Optional, Set
 from banking_system_components.account import Account
+from banking_system_components.formatting import BALANCE_WIDTH, format_balance, format_money
+from banking_system_components.transaction import (
+    TRANSACTION_TYPES, TransactionType, format_transaction_id)
+
+# Column order of the accounts CSV file.
+FIELDNAMES = ("account_id", "first_name", "last_name", "age",
+              "state", "job", "account_type", "balance")
+# Number of journal entries written between fsync calls.
+JOURNAL_SYNC_INTERVAL = 64
+# Number of accounts formatted and written per chunk of a full CSV export.
+EXPORT_CHUNK_SIZE = 100_000
+# A full export is written here first, then moved over the accounts CSV file.
+EXPORT_TEMP_PATH = "accounts_dataset.csv.tmp"
+# An accounts CSV file that cannot be loaded is moved here, out of the way.
+UNREADABLE_CSV_PATH = "accounts_dataset.csv.bad"
+# The transaction log of those accounts is moved along with it.
+UNREADABLE_TRANSACTION_LOG_PATH = "transactions.log.bad"
+# A copy of a balance journal with unreadable entries is kept here.
+UNREADABLE_JOURNAL_PATH = "balances.log.bad"
+
+# Values drawn from by load_initial_accounts.
+SEED_FIRST_NAMES = ("James", "Mary", "John", "Patricia", "Robert",
+                    "Jennifer", "Michael", "Linda", "William", "Elizabeth")
+SEED_LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones",
+                   "Garcia", "Miller", "Davis", "Rodriguez", "Martinez")
+SEED_STATES = ("Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut",
+               "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa",
+               "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota")
+SEED_AGES = range(18, 81)
+SEED_JOBS = ("Employed", "Unemployed")
+
+
+class _RowBuffer(list):
+    """Collects the lines a csv.writer produces, one entry per row."""
+    write = list.append
 
 class Bank:
     """Represents a bank with multiple accounts."""
@@ -10,26 +47,137 @@ class Bank:
     def __init__(self) -> None:
         """Initialize the bank with an empty account database."""
         self.accounts: Dict[str, Account] = {}
+        self._dirty: Set[str] = set()
+        self._journal: Optional[BinaryIO] = None
+        self._journal_pending = 0
+        self._transaction_log: Optional[BinaryIO] = None
+        self._transaction_log_pending = 0
+        # Byte offset of each account's balance field in the CSV file, and
+        # whether rows were added, removed or edited since the last export.
+        self._balance_offsets: Dict[str, int] = {}
+        self._rewrite_needed = True
+        # The CSV file stays open between in-place flushes.
+        self._csv_file: Optional[BinaryIO] = None
 
-    def load_initial_accounts(self) -> None:
-        first_names = ["James", "Mary", "John", "Patricia", "Robert",
-                       "Jennifer", "Michael", "Linda", "William", "Elizabeth"]
-        last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones",
-                      "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
-        states = ["Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", 
-                  "Delaware","Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", 
-                  "Kansas", "Kentucky", "Louisiana","Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota"]
-        for i in range(20):
-            first_name = random.choice(first_names)
-            last_name = random.choice(last_names)
-            age = random.randint(18, 80)
-            state = random.choice(states)
-            job = "Retired" if age > 67 else random.choice(["Employed", "Unemployed"])
+    def load_initial_accounts(self, count: int = 20) -> None:
+        """
+        Create a set of random accounts and export them to the CSV file once.
+
+        Args:
+            count (int): The number of accounts to create (default: 20).
+        """
+        # Draw each column in one call rather than one call per account.
+        chosen_first_names = random.choices(SEED_FIRST_NAMES, k=count)
+        chosen_last_names = random.choices(SEED_LAST_NAMES, k=count)
+        ages = random.choices(SEED_AGES, k=count)
+        chosen_states = random.choices(SEED_STATES, k=count)
+        jobs = random.choices(SEED_JOBS, k=count)
+        balances = [round(random.uniform(100.0, 10000.0), 2) for _ in range(count)]
+        for i in range(count):
+            age = ages[i]
+            job = "Retired" if age > 67 else jobs[i]
             account_type = "Checking" if i % 2 == 0 else "Savings"
-            balance = round(random.uniform(100.0, 10000.0), 2)
-            self.create_account(first_name, last_name, age, state, job, account_type, balance)
+            self.create_account(chosen_first_names[i], chosen_last_names[i], age,
+                                chosen_states[i], job, account_type, balances[i], flush=False)
         self.export_accounts_to_csv()
 
+    def load_accounts_from_csv(self) -> bool:
+        """
+        Load the accounts saved to the CSV file by a previous run.
+
+        The byte offset of every balance is recorded as rows are read, so
+        later balance changes can be patched in place without rewriting the
+        file first. Balances still in the balance journal, left behind when a
+        previous run stopped before writing them to the CSV file, are applied
+        on top.
+
+        A file that cannot be parsed is reported and moved to
+        UNREADABLE_CSV_PATH, together with the transaction log of its
+        accounts, and no accounts are loaded from it.
+
+        Returns:
+            bool: True if saved accounts were loaded, False if the CSV file is
+                missing, holds no accounts or cannot be parsed.
+        """
+        try:
+            with open("accounts_dataset.csv", "rb") as csvfile:
+                lines = csvfile.readlines()
+        except FileNotFoundError:
+            return False
+        if len(lines) < 2:
+            # An empty or header-only file has no accounts to load.
+            return False
+        # Byte position just past each line, for the balance offsets.
+        ends = list(accumulate(map(len, lines)))
+        reader = csv.reader(line.decode() for line in lines)
+        accounts = {}
+        offsets = {}
+        try:
+            if tuple(next(reader, ())) != FIELDNAMES:
+                raise ValueError("unexpected header")
+            for row in reader:
+                if not row:
+                    # Blank lines, such as a trailing newline added by an editor.
+                    continue
+                (account_id, first_name, last_name, age, state, job,
+                 account_type, balance) = row
+                account = Account(first_name, last_name, int(age), state, job,
+                                  account_type, float(balance), account_id)
+                account._bank = self
+                accounts[account_id] = account
+                line_index = reader.line_num - 1
+                if lines[line_index].endswith(b"\r\n") and len(balance) == BALANCE_WIDTH:
+                    offsets[account_id] = ends[line_index] - 2 - BALANCE_WIDTH
+        except (ValueError, csv.Error) as e:
+            os.replace("accounts_dataset.csv", UNREADABLE_CSV_PATH)
+            try:
+                os.replace("transactions.log", UNREADABLE_TRANSACTION_LOG_PATH)
+            except FileNotFoundError:
+                pass
+            print(f"Could not load accounts_dataset.csv (line {reader.line_num}: {e}). "
+                  f"The file was moved to {UNREADABLE_CSV_PATH}.")
+            return False
+        if not accounts:
+            return False
+        self.accounts.update(accounts)
+        self._balance_offsets = offsets
+        self._rewrite_needed = False
+        self._replay_journal()
+        return True
+
+    def _replay_journal(self) -> None:
+        """
+        Apply balances left in the balance journal and write them to the CSV file.
+
+        Entries that cannot be parsed are skipped and reported, and a copy of
+        the journal is kept at UNREADABLE_JOURNAL_PATH before it is cleared.
+        """
+        try:
+            with open("balances.log", "rb") as journal:
+                # Anything after the last newline is an incomplete entry.
+                entries = journal.read().split(b"\n")[:-1]
+        except FileNotFoundError:
+            return
+        skipped = 0
+        for entry in entries:
+            try:
+                account_id, _, balance = entry.decode().rpartition(",")
+                account = self.accounts.get(account_id)
+                if account is not None:
+                    account.balance = float(balance)
+                    self._dirty.add(account_id)
+            except ValueError:
+                skipped += 1
+        if skipped:
+            shutil.copyfile("balances.log", UNREADABLE_JOURNAL_PATH)
+            print(f"Skipped {skipped} unreadable entries in balances.log. "
+                  f"A copy was kept as {UNREADABLE_JOURNAL_PATH}.")
+        if not self._dirty:
+            os.remove("balances.log")
+            return
+        self._journal = open("balances.log", "ab", buffering=64 * 1024)
+        self.flush()
+
     def create_account(
         self,
         first_name: str,
@@ -38,7 +186,8 @@ class Bank:
         state: str,
         job: str,
         account_type: str = "Checking",
-        initial_balance: float = 0.0
+        initial_balance: float = 0.0,
+        flush: bool = True
     ) -> str:
         """
         Create a new account.
@@ -51,31 +200,43 @@ class Bank:
             job (str): The job title of the account holder.
             account_type (str): The type of account (Checking or Savings).
             initial_balance (float): The initial balance for the account.
+            flush (bool): Whether to export the accounts CSV right away. Bulk
+                loaders pass False and export once at the end.
 
         Returns:
             str: The ID of the created account.
         """
         account = Account(first_name, last_name, age, state,
                           job, account_type, initial_balance)
+        account._bank = self
         self.accounts[account.account_id] = account
-        self.export_accounts_to_csv()
+        if flush:
+            self.export_accounts_to_csv()
+        else:
+            self._rewrite_needed = True
         print(f"Account created for {first_name} {last_name}. Account ID: {account.account_id}") 
         return account.account_id
 
-    def delete_account(self, account_id: str) -> None:
+    def delete_account(self, account_id: str, flush: bool = True) -> None:
         """
         Delete an account by ID.
 
         Args:
             account_id (str): The ID of the account to delete.
+            flush (bool): Whether to export the accounts CSV right away.
 
         Raises:
             ValueError: If the account ID is not found.
         """
         if account_id not in self.accounts:
             raise ValueError("Account not found.")
-        del self.accounts[account_id]
-        self.export_accounts_to_csv()
+        # Changes made later through a leftover reference no longer reach the bank.
+        self.accounts.pop(account_id)._bank = None
+        self._dirty.discard(account_id)
+        if flush:
+            self.export_accounts_to_csv()
+        else:
+            self._rewrite_needed = True
         print(f"Account {account_id} has been deleted.")
 
     def get_account(self, account_id: str) -> Account:
@@ -92,9 +253,15 @@ class Bank:
             raise ValueError("Account not found.")
         return self.accounts[account_id]
 
-    def update_account_info(self) -> None:
-        """Update account holder's information."""
-        account_id = input("Enter account ID: ")
+    def update_account_info(self, ask: Callable[[str], str] = input) -> None:
+        """
+        Update account holder's information.
+
+        Args:
+            ask (Callable[[str], str]): Reads the answer to a prompt; defaults
+                to input().
+        """
+        account_id = ask("Enter account ID: ")
         try:
             account = self.get_account(account_id)
             print("What would you like to change?")
@@ -102,23 +269,23 @@ class Bank:
             print("2. Last Name")
             print("3. Age")
             print("4. State")
-            choice = input("Choose an option (1/2/3/4): ")
+            choice = ask("Choose an option (1/2/3/4): ")
 
             if choice == "1":
-                new_first_name = input("Enter new first name: ")
+                new_first_name = ask("Enter new first name: ")
                 account.update_info(first_name=new_first_name)
             elif choice == "2":
-                new_last_name = input("Enter new last name: ")
+                new_last_name = ask("Enter new last name: ")
                 account.update_info(last_name=new_last_name)
             elif choice == "3":
                 try:
-                    new_age = int(input("Enter new age: "))
+                    new_age = int(ask("Enter new age: "))
                     account.update_info(age=new_age)
                 except ValueError:
                     print("Invalid input. Age must be a number.")
                     return
             elif choice == "4":
-                new_state = input("Enter new state: ")
+                new_state = ask("Enter new state: ")
                 account.update_info(state=new_state)
             else:
                 print("Invalid option. Please try again.")
@@ -127,36 +294,219 @@ class Bank:
             print("Account information updated successfully.")
         except ValueError as e:
             print(e)
-        self.export_accounts_to_csv()
+        self.flush()
 
     def list_accounts(self) -> None:
         """List all accounts in the bank."""
         if not self.accounts:
             print("No accounts in the bank.")
-        for account_id, account in self.accounts.items():
-            print(f"ID: {account_id} | Name: {account.first_name} {account.last_name}| Age: {account.age} | State: {account.state} | Job: {account.job}| Type: {account.account_type} | Balance: ${account.balance:.2f}") 
+            return
+        print("\n".join(
+            f"ID: {account_id} | Name: {account.first_name} {account.last_name}| Age: {account.age} | State: {account.state} | Job: {account.job}| Type: {account.account_type} | Balance: ${format_money(account.balance)}"
+            for account_id, account in self.accounts.items()))
+
+    def mark_dirty(self, *accounts: Account) -> None:
+        """
+        Record that one or more accounts changed since the last export.
+
+        The new balances are appended to the balance journal in a single
+        write, so the change reaches disk without rewriting the whole CSV
+        file and both sides of a transfer land in the journal together. The
+        journal is buffered and synced every JOURNAL_SYNC_INTERVAL entries;
+        call sync() to force it out sooner.
+
+        Args:
+            *accounts (Account): The accounts that changed.
+        """
+        if self._journal is None:
+            self._journal = open("balances.log", "ab", buffering=64 * 1024)
+        entries = []
+        for account in accounts:
+            self._dirty.add(account.account_id)
+            entries.append(f"{account.account_id},{format_money(account.balance)}\n")
+        self._journal.write("".join(entries).encode())
+        self._journal_pending += len(accounts)
+        if self._journal_pending >= JOURNAL_SYNC_INTERVAL:
+            self.sync()
+
+    def log_transaction(
+        self,
+        account_id: str,
+        type_code: TransactionType,
+        amount: float,
+        target_account: Optional[str],
+        seq: int
+    ) -> None:
+        """
+        Append a transaction to the transaction log.
+
+        The log is opened once and only ever appended to, so the history of
+        every account survives the process without rewriting anything. It is
+        buffered and written out together with the balance journal.
+
+        Args:
+            account_id (str): The account the transaction belongs to.
+            type_code (TransactionType): The type of the transaction.
+            amount (float): The transaction amount.
+            target_account (str, optional): The other account of a transfer.
+            seq (int): The transaction's sequence number.
+        """
+        if self._transaction_log is None:
+            self._transaction_log = open("transactions.log", "ab", buffering=64 * 1024)
+        self._transaction_log.write(
+            f"{format_transaction_id(seq)},{account_id},{TRANSACTION_TYPES[type_code]},"
+            f"{format_money(amount)},{target_account or ''}\n".encode())
+        self._transaction_log_pending += 1
+
+    def clear_transaction_log(self) -> None:
+        """Remove the transaction log, e.g. when the accounts it refers to are replaced."""
+        if self._transaction_log is not None:
+            self._transaction_log.close()
+            self._transaction_log = None
+        self._transaction_log_pending = 0
+        try:
+            os.remove("transactions.log")
+        except FileNotFoundError:
+            pass
+
+    def sync(self) -> None:
+        """Force buffered journal and transaction log entries to disk."""
+        if self._journal is not None and self._journal_pending:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._journal_pending = 0
+        if self._transaction_log is not None and self._transaction_log_pending:
+            self._transaction_log.flush()
+            os.fsync(self._transaction_log.fileno())
+        self._transaction_log_pending = 0
+
+    def mark_details_changed(self) -> None:
+        """
+        Record that an account holder's details changed since the last export.
+
+        Edited rows can change length, so the next flush rewrites the whole file.
+        """
+        self._rewrite_needed = True
+
+    def flush(self) -> None:
+        """
+        Write pending account changes to the CSV file.
+
+        Balance-only changes overwrite the affected balance fields in place,
+        through a file handle kept open until the next full export or close();
+        added, removed or edited accounts rewrite the whole file.
+        """
+        if self._rewrite_needed:
+            self.export_accounts_to_csv()
+            return
+        if not self._dirty:
+            return
+        patches = []
+        for account_id in self._dirty:
+            balance = format_balance(self.accounts[account_id].balance)
+            if account_id not in self._balance_offsets or len(balance) != BALANCE_WIDTH:
+                self.export_accounts_to_csv()
+                return
+            patches.append((self._balance_offsets[account_id], balance.encode()))
+        if self._csv_file is None:
+            try:
+                self._csv_file = open("accounts_dataset.csv", "r+b")
+            except FileNotFoundError:
+                self.export_accounts_to_csv()
+                return
+        csvfile = self._csv_file
+        for offset, balance in sorted(patches):
+            csvfile.seek(offset)
+            csvfile.write(balance)
+        csvfile.flush()
+        self._sync_csv(csvfile)
+        self._checkpoint()
+
+    def close(self) -> None:
+        """Flush pending changes, close the transaction log and remove the balance journal."""
+        self.flush()
+        self._close_csv()
+        if self._transaction_log is not None:
+            self.sync()
+            self._transaction_log.close()
+            self._transaction_log = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            os.remove("balances.log")
 
     def export_accounts_to_csv(self) -> None:
-        """Export all account data to a CSV file."""
-        with open("accounts_dataset.csv", "w", newline="") as csvfile:
-            fieldnames = ["account_id", "first_name", "last_name",
-                          "age", "state", "job", "account_type", "balance"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for account in self.accounts.values():
-                writer.writerow({
-                    "account_id": account.account_id,
-                    "first_name": account.first_name,
-                    "last_name": account.last_name,
-                    "age": account.age,
-                    "state": account.state,
-                    "job": account.job,
-                    "account_type": account.account_type,
-                    "balance": account.balance,
-                })
+        """
+        Export all account data to a CSV file.
+
+        Rows are formatted and written EXPORT_CHUNK_SIZE accounts at a time, so
+        memory use stays bounded however many accounts the bank holds. The
+        rows go to EXPORT_TEMP_PATH, which then replaces the CSV file in one
+        step, so an interrupted export never leaves a partly written file.
+        """
+        self._close_csv()
+        offsets = {}
+        lines = _RowBuffer()
+        writer = csv.writer(lines)
+        writer.writerow(FIELDNAMES)
+        accounts = iter(self.accounts.values())
+        header = lines.pop().encode()
+        position = len(header)
+        with open(EXPORT_TEMP_PATH, "wb") as csvfile:
+            csvfile.write(header)
+            while chunk := list(islice(accounts, EXPORT_CHUNK_SIZE)):
+                rows = [
+                    (account.account_id, account.first_name, account.last_name,
+                     account.age, account.state, account.job,
+                     account.account_type, format_balance(account.balance))
+                    for account in chunk]
+                writer.writerows(rows)
+                data = [line.encode() for line in lines]
+                lines.clear()
+                # Each row ends with the balance field followed by "\r\n".
+                for row, line in zip(rows, data):
+                    position += len(line)
+                    if len(row[-1]) == BALANCE_WIDTH:
+                        offsets[row[0]] = position - 2 - BALANCE_WIDTH
+                csvfile.write(b"".join(data))
+            self._sync_csv(csvfile)
+        os.replace(EXPORT_TEMP_PATH, "accounts_dataset.csv")
+        self._balance_offsets = offsets
+        self._rewrite_needed = False
+        self._checkpoint()
+
+    def _close_csv(self) -> None:
+        """Close the CSV file kept open for in-place updates, if any."""
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+
+    def _sync_csv(self, csvfile: BinaryIO) -> None:
+        """
+        Force the CSV file to disk if journaled balances are about to be dropped.
+
+        The checkpoint that follows a write truncates the balance journal, so
+        the CSV must be durable first; without journal entries there is
+        nothing to lose and the sync is skipped.
+
+        Args:
+            csvfile (BinaryIO): The open accounts CSV file.
+        """
+        if self._dirty and self._journal is not None:
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+
+    def _checkpoint(self) -> None:
+        """Mark every change as written to the CSV file."""
+        self._dirty.clear()
+        if self._journal is not None:
+            # The CSV now holds every balance, so the journal can start over.
+            self._journal.truncate(0)
+        self._journal_pending = 0
 
     def delete_account_csv(self) -> None:
         """Delete the accounts CSV file. Important for cleanup after testing"""
+        self._close_csv()
         try:
             os.remove("accounts_dataset.csv")
             print("Accounts CSV file deleted.")
@@ -1,109 +1,232 @@
-from rich.console import Console
+import atexit
+import csv
+import math
+import os
+import shlex
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterable, Optional
+from banking_system_components.account import ACCOUNT_TYPES
 from banking_system_components.bank import Bank
+from banking_system_components.formatting import format_money
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+# Header of exported transaction history files.
+TRANSACTION_FIELDNAMES = ("type", "amount", "target_account", "transaction_id")
+# Markup of the main menu, parsed once when the CLI starts.
+MENU_MARKUP = "\n".join((
+    "\n[bold blue]Banking System Menu:[/bold blue]",
+    "\n[bold green]Banking Transactions:[/bold green]",
+    "[bold green]1.[/bold green] Deposit Money",
+    "[bold green]2.[/bold green] Withdraw Money",
+    "[bold green]3.[/bold green] Transfer Money",
+    "[bold green]4.[/bold green] View Transaction History",
+    "[bold green]5.[/bold green] Filter Transactions by Type",
+    "\n[#e72a77]Account Operations:[/#e72a77]",
+    "[#e72a77]6.[/#e72a77] Create Account",
+    "[#e72a77]7.[/#e72a77] Delete Account",
+    "[#e72a77]8.[/#e72a77] View Account Details",
+    "[#e72a77]9.[/#e72a77] Update Account Details",
+    "[#e72a77]10.[/#e72a77] Export Transaction History",
+    "[#e72a77]11.[/#e72a77] List All Accounts",
+    "\n[bold red]12. Exit[/bold red]",
+))
 
 
 class BankCLI:
     """CLI for the banking system."""
 
-    def __init__(self) -> None:
-        """Initialize the CLI with a Bank instance."""
+    def __init__(self, reset: bool = False) -> None:
+        """
+        Initialize the CLI with a Bank instance.
+
+        Accounts saved by a previous run are loaded from the accounts CSV
+        file; a new set of random accounts is generated when there are no
+        saved accounts to load or when a reset is requested. The transaction
+        log is discarded only on a reset or when there was no saved file at
+        all; the log of an unreadable file is kept next to it by the bank.
+
+        Args:
+            reset (bool): Whether to discard saved accounts and generate new ones.
+        """
         self.bank = Bank()
-        self.bank.load_initial_accounts()
-        self.console = Console()
+        saved = os.path.exists("accounts_dataset.csv")
+        if reset or not self.bank.load_accounts_from_csv():
+            if reset or not saved:
+                self.bank.clear_transaction_log()
+            self.bank.load_initial_accounts()
+        atexit.register(self.bank.close)
+        # rich is imported and the menu rendered only when the menu is shown,
+        # so batch runs never load it.
+        self._console: Optional['Console'] = None
+        self._menu: Optional[str] = None
+        self._actions = {
+            "1": self.deposit_money,
+            "2": self.withdraw_money,
+            "3": self.transfer_money,
+            "4": self.view_transaction_history,
+            "5": self.filter_transactions,
+            "6": self.create_account,
+            "7": self.delete_account,
+            "8": self.view_account_details,
+            "9": lambda: self.bank.update_account_info(ask=self._ask),
+            "10": self.export_transaction_history,
+            "11": self.bank.list_accounts,
+        }
+        # Answers for the command being run by run_batch, if any.
+        self._batch_answers: Optional[Deque[str]] = None
+
+    @property
+    def console(self) -> 'Console':
+        """The rich console used to render the menu, created on first use."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def _render_menu(self) -> str:
+        """Render the menu markup once and return the finished text."""
+        if self._menu is None:
+            from rich.text import Text
+            with self.console.capture() as capture:
+                self.console.print(Text.from_markup(MENU_MARKUP))
+            self._menu = capture.get()
+        return self._menu
+
+    def _ask(self, prompt: str) -> str:
+        """Read the answer to a prompt, from the current batch command if one is running."""
+        if self._batch_answers is None:
+            return input(prompt)
+        return self._batch_answers.popleft() if self._batch_answers else ""
+
+    def _read_float(self, prompt: str) -> Optional[float]:
+        """
+        Ask for an amount of money.
+
+        Args:
+            prompt (str): The prompt to show.
+
+        Returns:
+            float: The amount entered, or None (after telling the user) if it is
+                not a finite number.
+        """
+        try:
+            amount = float(self._ask(prompt))
+        except ValueError:
+            amount = math.nan
+        if not math.isfinite(amount):
+            print("Invalid input. Amount must be a number.")
+            return None
+        return amount
 
     def menu(self) -> None:
         """Display the banking system menu and handle user input."""
+        menu = self._render_menu()
         while True:
-            self.console.print("\n[bold blue]Banking System Menu:[/bold blue]")
-            self.console.print("\n[bold green]Banking Transactions:[/bold green]")
-            self.console.print("[bold green]1.[/bold green] Deposit Money")
-            self.console.print("[bold green]2.[/bold green] Withdraw Money")
-            self.console.print("[bold green]3.[/bold green] Transfer Money")
-            self.console.print("[bold green]4.[/bold green] View Transaction History")
-            self.console.print("[bold green]5.[/bold green] Filter Transactions by Type")
-            self.console.print("\n[#e72a77]Account Operations:[/#e72a77]")
-            self.console.print("[#e72a77]6.[/#e72a77] Create Account")
-            self.console.print("[#e72a77]7.[/#e72a77] Delete Account")
-            self.console.print("[#e72a77]8.[/#e72a77] View Account Details")
-            self.console.print("[#e72a77]9.[/#e72a77] Update Account Details")
-            self.console.print("[#e72a77]10.[/#e72a77] Export Transaction History")
-            self.console.print("[#e72a77]11.[/#e72a77] List All Accounts")
-            self.console.print("\n[bold red]12. Exit[/bold red]")
+            sys.stdout.write(menu)
 
             choice = input("\n Choose an option (From 1 to 12): ")
-            if choice == "1":
-                self.deposit_money()
-            elif choice == "2":
-                self.withdraw_money()
-            elif choice == "3":
-                self.transfer_money()
-            elif choice == "4":
-                self.view_transaction_history()
-            elif choice == "5":
-                self.filter_transactions()
-            elif choice == "6":
-                self.create_account()
-            elif choice == "7":
-                self.delete_account()
-            elif choice == "8":
-                self.view_account_details()
-            elif choice == "9":
-                self.bank.update_account_info()
-            elif choice == "10":
-                self.export_transaction_history()
-            elif choice == "11":
-                self.bank.list_accounts()
-            elif choice == "12":
+            if choice == "12":
                 print("Exiting the banking system. Goodbye!")
                 break
-            else:
+            action = self._actions.get(choice)
+            if action is None:
                 print("Invalid option. Please try again.")
+            else:
+                action()
+            self.bank.flush()
+
+    def run_batch(self, lines: Iterable[str]) -> None:
+        """
+        Run menu commands non-interactively, one command per line.
+
+        Each line holds a menu option followed by the answers to that option's
+        prompts, e.g. ``1 <account ID> 250`` deposits 250. Answers containing
+        spaces must be quoted, and ``#`` starts a comment. The menu is not
+        shown, and the accounts CSV is written once when the batch ends. A
+        line that cannot be parsed or whose command fails with a ValueError or
+        OSError is reported and skipped, and the batch carries on with the
+        next line.
+
+        Args:
+            lines (Iterable[str]): The commands to run, such as sys.stdin.
+        """
+        for line in lines:
+            try:
+                answers = shlex.split(line, comments=True)
+            except ValueError as e:
+                print(f"Invalid command: {line.strip()} ({e})")
+                continue
+            if not answers:
+                continue
+            choice = answers.pop(0)
+            if choice == "12":
+                break
+            action = self._actions.get(choice)
+            if action is None:
+                print(f"Invalid option: {choice}")
+                continue
+            self._batch_answers = deque(answers)
+            try:
+                action()
+            except (ValueError, OSError) as e:
+                print(e)
+            finally:
+                self._batch_answers = None
+        self.bank.flush()
 
     def create_account(self) -> None: 
         """Handle account creation."""
-        first_name = input("Enter account holder's first name: ")
+        first_name = self._ask("Enter account holder's first name: ")
         # Validate that first name contains only letters
         if not first_name.isalpha():
             print("Invalid input. First name should only contain letters.")
             return
 
-        last_name = input("Enter account holder's last name: ")
+        last_name = self._ask("Enter account holder's last name: ")
         if not last_name.isalpha():
             print("Invalid input. Last name should only contain letters.")
             return
 
         try:
-            age = int(input("Enter account holder's age: "))
+            age = int(self._ask("Enter account holder's age: "))
         except ValueError:
             print("Invalid input. Age must be a number.")
             return
 
-        state = input("Enter account holder's state: ")
+        state = self._ask("Enter account holder's state: ")
         if not state.isalpha():
             print("Invalid input. State should only contain letters.")
             return
 
-        job = input("Enter account holder's job: ")
+        job = self._ask("Enter account holder's job: ")
         if not job.isalpha():
             print("Invalid input. Job should only contain letters.")
             return
 
-        account_type = input("Enter account type (Checking/Savings): ")
-        if account_type not in ["Checking", "Savings"]:
+        account_type = self._ask("Enter account type (Checking/Savings): ")
+        if account_type not in ACCOUNT_TYPES:
             print("Invalid input. Account type must be either 'Checking' or 'Savings'.")
             return
         try:
-            initial_balance = float(input("Enter initial balance: "))
+            initial_balance = float(self._ask("Enter initial balance: "))
         except ValueError:
+            initial_balance = math.nan
+        if not math.isfinite(initial_balance):
             print("Invalid input. Initial balance must be a number.")
             return
 
-        self.bank.create_account(
-            first_name, last_name, age, state, job, account_type, initial_balance)
+        try:
+            self.bank.create_account(
+                first_name, last_name, age, state, job, account_type, initial_balance)
+        except ValueError as e:
+            print(e)
 
     def delete_account(self) -> None:
         """Handle account deletion."""
-        account_id = input("Enter account ID to delete: ")
+        account_id = self._ask("Enter account ID to delete: ")
         try:
             self.bank.delete_account(account_id)
         except ValueError as e:
@@ -111,93 +234,96 @@ class BankCLI:
 
     def deposit_money(self) -> None:
         """Handle money deposit."""
-        account_id = input("Enter account ID: ")
+        account_id = self._ask("Enter account ID: ")
+        amount = self._read_float("Enter deposit amount: ")
+        if amount is None:
+            return
         try:
-            amount = float(input("Enter deposit amount: "))
             account = self.bank.get_account(account_id)
-            account.deposit(amount)
-            print(f"Deposited ${amount:.2f} into account {
-                  account_id}. New balance: ${account.balance:.2f}")
+            amount = account.deposit(amount)
+            print(f"Deposited ${format_money(amount)} into account {account_id}. New balance: ${format_money(account.balance)}")
         except ValueError as e:
             print(e)
 
     def withdraw_money(self) -> None:
         """Handle money withdrawal."""
-        account_id = input("Enter account ID: ")
+        account_id = self._ask("Enter account ID: ")
+        amount = self._read_float("Enter withdrawal amount: ")
+        if amount is None:
+            return
         try:
-            amount = float(input("Enter withdrawal amount: "))
             account = self.bank.get_account(account_id)
-            account.withdraw(amount)
-            print(f"Withdrew ${amount:.2f} from account {account_id}. New balance: ${account.balance:.2f}")  
+            amount = account.withdraw(amount)
+            print(f"Withdrew ${format_money(amount)} from account {account_id}. New balance: ${format_money(account.balance)}")  
         except ValueError as e:
             print(e)
 
     def transfer_money(self) -> None:
         """Handle money transfer."""
-        from_account_id = input("Enter your account ID: ")
-        to_account_id = input("Enter the target account ID: ")
+        from_account_id = self._ask("Enter your account ID: ")
+        to_account_id = self._ask("Enter the target account ID: ")
+        amount = self._read_float("Enter transfer amount: ")
+        if amount is None:
+            return
         try:
-            amount = float(input("Enter transfer amount: "))
             from_account = self.bank.get_account(from_account_id)
             to_account = self.bank.get_account(to_account_id)
-            from_account.transfer(to_account, amount)
-            print(f"Transferred ${amount:.2f} from account {from_account_id} to {to_account_id}.")  
+            amount = from_account.transfer(to_account, amount)
+            print(f"Transferred ${format_money(amount)} from account {from_account_id} to {to_account_id}.")  
         except ValueError as e:
             print(e)
 
     def view_transaction_history(self) -> None:
         """View transaction history for an account."""
-        account_id = input("Enter account ID: ")
+        account_id = self._ask("Enter account ID: ")
         try:
             account = self.bank.get_account(account_id)
-            transactions = account.get_transaction_history()
-            if not transactions:
+            if not account.transaction_count:
                 print("No transactions found.")
                 return
-            print("Transaction History:")
-            for transaction in transactions:
-                print(transaction)
+            print("\n".join(
+                ["Transaction History:", *map(str, account.get_transaction_history())]))
         except ValueError as e:
             print(e)
 
     def filter_transactions(self) -> None:
         """Filter transactions by type."""
-        account_id = input("Enter account ID: ")
-        transaction_type = input(
+        account_id = self._ask("Enter account ID: ")
+        transaction_type = self._ask(
             "Enter transaction type (Deposit, Withdrawal, Transfer In, Transfer Out): ")
         try:
             account = self.bank.get_account(account_id)
-            filtered = account.filter_transactions(transaction_type)
+            filtered = list(map(str, account.get_transaction_history(transaction_type)))
             if not filtered:
                 print(f"No transactions of type '{transaction_type}' found.")
                 return
-            print(f"Filtered Transactions ({transaction_type}):")
-            for transaction in filtered:
-                print(transaction.to_dict())
+            print("\n".join([f"Filtered Transactions ({transaction_type}):", *filtered]))
         except ValueError as e:
             print(e)
 
     def export_transaction_history(self) -> None:
         """Export transaction history to a file."""
-        account_id = input("Enter account ID: ")
+        account_id = self._ask("Enter account ID: ")
         try:
             account = self.bank.get_account(account_id)
-            transactions = account.get_transaction_history()
-            if not transactions:
+            if not account.transaction_count:
                 print("No transactions to export.")
                 return
-            filename = input(
+            filename = self._ask(
                 "Enter filename to export to (e.g., transactions.csv): ")
-            with open(filename, "w") as file:
-                for transaction in transactions:
-                    file.write(f"{transaction}\n")
+            with open(filename, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(TRANSACTION_FIELDNAMES)
+                writer.writerows(account.get_transaction_rows())
             print(f"Transaction history exported to {filename}.")
         except ValueError as e:
             print(e)
+        except OSError as e:
+            print(f"Could not export transaction history: {e}")
 
     def view_account_details(self) -> None:
         """View details of an account."""
-        account_id = input("Enter account ID: ")
+        account_id = self._ask("Enter account ID: ")
         try:
             account = self.bank.get_account(account_id)
             print(f"Account Details for {account_id}:")
@@ -0,0 +1,37 @@
+from functools import lru_cache
+
+# Balances in the accounts CSV file are zero-padded to this width, so they
+# can be rewritten in place.
+BALANCE_WIDTH = 12
+
+
+@lru_cache(maxsize=4096)
+def format_money(amount: float) -> str:
+    """
+    Format an amount of money with two decimal places.
+
+    Results are cached, so balances and amounts that repeat (round-number
+    deposits, untouched balances listed again) are only formatted once.
+
+    Args:
+        amount (float): The amount to format.
+
+    Returns:
+        str: The amount with exactly two decimal places, e.g. "1500.00".
+    """
+    return f"{amount:.2f}"
+
+
+@lru_cache(maxsize=4096)
+def format_balance(balance: float) -> str:
+    """
+    Format a balance for the accounts CSV file.
+
+    Args:
+        balance (float): The balance to format.
+
+    Returns:
+        str: The balance with two decimal places, zero-padded to
+            BALANCE_WIDTH characters, e.g. "000001500.00".
+    """
+    return f"{balance:0{BALANCE_WIDTH}.2f}"
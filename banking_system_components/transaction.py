@@ -1,15 +1,49 @@
+from enum import IntEnum
 from typing import Dict, Optional
-import uuid
+import itertools
+import os
+import sys
+
+
+class TransactionType(IntEnum):
+    """Transaction type codes; each code indexes its name in TRANSACTION_TYPES."""
+    DEPOSIT = 0
+    WITHDRAWAL = 1
+    TRANSFER_OUT = 2
+    TRANSFER_IN = 3
+
+
+TRANSACTION_TYPES = ("Deposit", "Withdrawal", "Transfer Out", "Transfer In")
+TYPE_CODES = {name: TransactionType(code) for code, name in enumerate(TRANSACTION_TYPES)}
+
+
+# Transaction IDs are 32 hex characters: a random prefix drawn once per
+# process followed by a sequence number, so no new ID needs a system call.
+_ID_PREFIX = os.urandom(8).hex()
+next_transaction_seq = itertools.count().__next__
+
+
+def format_transaction_id(seq: int) -> str:
+    """Return the transaction ID for a sequence number."""
+    return f"{_ID_PREFIX}{seq:016x}"
+
+
+def new_transaction_id() -> str:
+    """Return a new unique transaction ID."""
+    return format_transaction_id(next_transaction_seq())
+
 
 class Transaction:
     """Represents a transaction in a banking account."""
 
-    def __init__(self, transaction_type: str, amount: float, target_account: Optional[str] = None) -> None:
+    __slots__ = ("transaction_type", "amount", "target_account", "transaction_id")
+
+    def __init__(self, transaction_type: str, amount: float, target_account: Optional[str] = None, transaction_id: Optional[str] = None) -> None:
         """Initialize a transaction."""
-        self.transaction_type = transaction_type
+        self.transaction_type = sys.intern(transaction_type)
         self.amount = amount
         self.target_account = target_account
-        self.transaction_id = uuid.uuid4().hex  # Unique transaction ID
+        self.transaction_id = transaction_id or new_transaction_id()  # Unique transaction ID
 
     def to_dict(self) -> Dict:
         """Convert the transaction to a dictionary format."""
@@ -1,5 +1,20 @@
+import argparse
+import sys
+
 from banking_system_components.command_line_interface import BankCLI
 
 if __name__ == "__main__":
-    cli = BankCLI()
-    cli.menu()
+    parser = argparse.ArgumentParser(description="Banking system command line interface.")
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="read one command per line from standard input instead of showing the menu")
+    parser.add_argument(
+        "--reset", action="store_true",
+        help="generate a new set of random accounts instead of loading the saved ones")
+    args = parser.parse_args()
+
+    cli = BankCLI(reset=args.reset)
+    if args.batch:
+        cli.run_batch(sys.stdin)
+    else:
+        cli.menu()
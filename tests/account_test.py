@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import call, mock_open, patch
 
 from banking_system_components.account import Account
+from banking_system_components.bank import Bank
+from banking_system_components.transaction import TransactionType
 
 class TestAccount(unittest.TestCase):
 
@@ -19,12 +21,69 @@ class TestAccount(unittest.TestCase):
         self.assertEqual(self.account.job, "Employed")
         self.assertEqual(self.account.account_type, "Checking")
         self.assertEqual(self.account.balance, 500.0)
+        self.assertEqual(len(self.account.account_id), 32)
+        int(self.account.account_id, 16)
+
+    @patch('banking_system_components.account.ACCOUNT_ID_BATCH', 4)
+    def test_account_ids_are_unique(self):
+        """Test generated account IDs are unique and existing IDs are kept."""
+        ids = {Account("Jane", "Doe", 28, "Nevada", "Employed").account_id for _ in range(10)}
+        self.assertEqual(len(ids), 10)
+        restored = Account("Jane", "Doe", 28, "Nevada", "Employed", "Savings", 0.0,
+                           self.account.account_id)
+        self.assertEqual(restored.account_id, self.account.account_id)
+
+    def test_repeated_details_are_shared(self):
+        """Test accounts share one copy of repeated state, job and type values."""
+        other = Account(
+            "Jane", "Doe", 28, "".join("California"), "".join("Employed"),
+            "".join("Checking"), 100.0)
+        self.assertIs(other.state, self.account.state)
+        self.assertIs(other.job, self.account.job)
+        self.assertIs(other.account_type, self.account.account_type)
+        with self.assertRaises(ValueError):
+            Account("Jane", "Doe", 28, "California", "Employed", "Brokerage")
 
     def test_deposit(self):
         """Test deposit functionality."""
         self.account.deposit(500.0)
         self.assertEqual(self.account.balance, 1000.0)
 
+    def test_balance_is_exact_in_cents(self):
+        """Test repeated small deposits do not accumulate rounding error."""
+        for _ in range(3):
+            self.account.deposit(0.1)
+        self.assertEqual(self.account.balance_cents, 50030)
+        self.assertEqual(self.account.balance, 500.3)
+        with self.assertRaises(ValueError):
+            self.account.deposit(0.001)
+
+    def test_amounts_applied_are_returned(self):
+        """Test deposit, withdraw and transfer return the amount rounded to cents."""
+        target_account = Account(
+            "Jane", "Doe", 28, "Nevada", "Unemployed", "Savings", 300.0)
+        self.assertEqual(self.account.deposit(0.015), 0.02)
+        self.assertEqual(self.account.withdraw(0.025), 0.02)
+        self.assertEqual(self.account.transfer(target_account, 10.004), 10.0)
+        self.assertEqual(self.account.balance, 490.0)
+
+    def test_non_finite_amounts_are_rejected(self):
+        """Test infinite and NaN amounts raise ValueError and leave the balance alone."""
+        target_account = Account(
+            "Jane", "Doe", 28, "Nevada", "Unemployed", "Savings", 300.0)
+        for amount in (float("inf"), float("-inf"), float("nan"), float("1e400"),
+                       1e307):
+            with self.assertRaises(ValueError):
+                self.account.deposit(amount)
+            with self.assertRaises(ValueError):
+                self.account.withdraw(amount)
+            with self.assertRaises(ValueError):
+                self.account.transfer(target_account, amount)
+        with self.assertRaises(ValueError):
+            Account("Jane", "Doe", 28, "Nevada", "Employed", "Savings", float("nan"))
+        self.assertEqual(self.account.balance, 500.0)
+        self.assertEqual(self.account.transaction_count, 0)
+
     def test_deposit_negative_amount(self):
         """Test deposit with negative amount raises error."""
         with self.assertRaises(ValueError):
@@ -67,29 +126,64 @@ class TestAccount(unittest.TestCase):
         deposits = self.account.filter_transactions("Deposit")
         self.assertEqual(len(deposits), 1)
         self.assertEqual(deposits[0].amount, 200.0)
+        withdrawals = self.account.filter_transactions(TransactionType.WITHDRAWAL)
+        self.assertEqual([t.amount for t in withdrawals], [100.0])
 
+    def test_get_transaction_history(self):
+        """Test transaction history records both sides of a transfer."""
+        target_account = Account(
+            "Jane", "Doe", 28, "Nevada", "Unemployed", "Savings", 300.0)
+        self.account.deposit(100.0)
+        self.account.transfer(target_account, 50.0)
+        history = list(self.account.get_transaction_history())
+        self.assertEqual(self.account.transaction_count, 2)
+        self.assertEqual([t["type"] for t in history], ["Deposit", "Transfer Out"])
+        self.assertEqual(history[1]["target_account"], target_account.account_id)
+        incoming = target_account.filter_transactions("Transfer In")
+        self.assertEqual(len(incoming), 1)
+        self.assertEqual(incoming[0].target_account, self.account.account_id)
+        self.assertEqual(incoming[0].to_dict(), next(target_account.get_transaction_history()))
+        self.assertEqual(
+            list(self.account.get_transaction_history("Transfer Out")), history[1:])
+        self.assertEqual(
+            list(self.account.get_transaction_history(TransactionType.DEPOSIT)), history[:1])
+        self.assertEqual(list(self.account.get_transaction_history("Refund")), [])
+        rows = list(self.account.get_transaction_rows())
+        self.assertEqual(rows[0], ("Deposit", 100.0, "", history[0]["transaction_id"]))
+        self.assertEqual(rows[1], tuple(history[1].values()))
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('banking_system_components.bank.os.fsync')
     @patch('builtins.open', new_callable=mock_open)
-    def test_export_balance_update(self, mock_file):
-        """Test exporting balance updates after a deposit."""
-        self.account.deposit(200.0)
-
-        # Validate that open was called correctly during the export
-        mock_file.assert_called_with("accounts.csv", "w", newline='')
-
-        # Get the mock file handle and inspect what was written
+    def test_balance_updates_are_written_in_place(self, mock_file, mock_fsync, mock_replace):
+        """Test that balance updates are written on flush rather than on every deposit."""
+        bank = Bank()
+        account = bank.get_account(bank.create_account(
+            "John", "Doe", 30, "California", "Employed", "Checking", 500.0))
+
+        # Validate the full export written when the account was created
+        mock_file.assert_called_once_with("accounts_dataset.csv.tmp", "wb")
+        mock_replace.assert_called_once_with("accounts_dataset.csv.tmp", "accounts_dataset.csv")
         handle = mock_file()
-        calls = handle.write.call_args_list
-
-        # Check that the header and account update lines are written correctly
-        header_call = call(
-            "account_id,first_name,last_name,age,state,job,account_type,balance\r\n")
-        self.assertIn(header_call, calls,
-                      "The CSV header was not written correctly.")
-
-        expected_balance_update_call = call(
-            f"{self.account.account_id},{self.account.first_name},{self.account.last_name},{self.account.age},{self.account.state},{self.account.job},{self.account.account_type},{self.account.balance:.2f}\r\n")
-        self.assertIn(expected_balance_update_call, calls,
-                      "The account balance update was not written correctly.")
+        exported = b"".join(c.args[0] for c in handle.write.call_args_list)
+        self.assertEqual(
+            exported,
+            b"account_id,first_name,last_name,age,state,job,account_type,balance\r\n"
+            + f"{account.account_id},John,Doe,30,California,Employed,Checking,000000500.00\r\n".encode())
+        mock_file.reset_mock()
+
+        account.deposit(200.0)
+        self.assertEqual(mock_file.call_args_list, [
+            call("transactions.log", "ab", buffering=64 * 1024),
+            call("balances.log", "ab", buffering=64 * 1024)])
+
+        bank.flush()
+
+        # Only the balance field is rewritten, in place
+        mock_file.assert_called_with("accounts_dataset.csv", "r+b")
+        offset = handle.seek.call_args.args[0]
+        self.assertEqual(exported[offset:offset + 12], b"000000500.00")
+        handle.write.assert_called_with(b"000000700.00")
 
     def test_get_details(self):
         """Test getting account details."""
@@ -105,12 +199,23 @@ class TestAccount(unittest.TestCase):
         )
         self.assertEqual(details, expected_details)
 
-    def test_zzz_delete_csv(self):
-        """ Cleaning up the CSV file after all tests are run. As unittest runs tests in alphabetical order, the function is named that way to ensure it runs last."""
+    def test_get_details_after_changes(self):
+        """Test details reflect balance and holder changes after being cached."""
+        self.account.get_details()
+        self.account.deposit(250.0)
+        self.account.update_info(job="Retired", age=68)
+        details = self.account.get_details()
+        self.assertIn("Age: 68\nState: California\nJob: Retired\n", details)
+        self.assertTrue(details.endswith("Balance: $750.00"))
+
+    @patch('banking_system_components.account.os.remove')
+    def test_delete_balance_csv(self, mock_remove):
+        """Test deleting the CSV file, and the error when it does not exist."""
         self.account.delete_balance_csv()
+        mock_remove.assert_called_once_with("accounts_dataset.csv")
+        mock_remove.side_effect = FileNotFoundError
         with self.assertRaises(FileNotFoundError):
-            with open("accounts.csv", "r"):
-                pass
+            self.account.delete_balance_csv()
 
 
 if __name__ == '__main__':
@@ -1,63 +1,118 @@
+import io
+import os
+import tempfile
 import unittest
-from unittest.mock import mock_open, patch
+from unittest.mock import call, mock_open, patch
+
+from banking_system_components.bank import (
+    EXPORT_TEMP_PATH, JOURNAL_SYNC_INTERVAL, UNREADABLE_CSV_PATH, UNREADABLE_JOURNAL_PATH,
+    Bank)
+
+
+# Account arguments shared by several tests, built once at import.
+_JANE = ("Jane", "Doe", 25, "New York", "Unemployed", "Savings", 1000.0)
+_ALICE = ("Alice", "Smith", 40, "Texas", "Employed", "Checking", 2000.0)
+_BOB = ("Bob", "Brown", 50, "Florida", "Employed", "Savings", 3000.0)
+
+
+class _InMemoryFile(io.BytesIO):
+    """A binary file double whose contents survive the with block that closes it."""
+
+    def close(self):
+        pass
+
+
+class TestBankReadOnly(unittest.TestCase):
+    """Tests that never change the bank, sharing one instance."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = Bank()
+
+    def test_delete_nonexistent_account(self):
+        with self.assertRaises(ValueError):
+            self.bank.delete_account("nonexistent_id")
+
+    def test_get_nonexistent_account(self):
+        with self.assertRaises(ValueError):
+            self.bank.get_account("nonexistent_id")
 
-from banking_system_components.bank import Bank
 
 class TestBank(unittest.TestCase):
 
     def setUp(self):
+        # Each test works in its own directory, so tests that write the real
+        # CSV and journal files never share them and can run in any order.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
         self.bank = Bank()
 
+    def assertAccountHas(self, account, expected):
+        """Compare several account attributes at once, reporting every mismatch."""
+        self.assertEqual({name: getattr(account, name) for name in expected}, expected)
+
     def test_create_account(self):
         account_id = self.bank.create_account(
             "John", "Doe", 30, "California", "Employed", "Checking", 500.0)
         self.assertIn(account_id, self.bank.accounts)
-        account = self.bank.accounts[account_id]
-        self.assertEqual(account.first_name, "John")
-        self.assertEqual(account.last_name, "Doe")
-        self.assertEqual(account.age, 30)
-        self.assertEqual(account.state, "California")
-        self.assertEqual(account.job, "Employed")
-        self.assertEqual(account.account_type, "Checking")
-        self.assertEqual(account.balance, 500.0)
+        self.assertAccountHas(self.bank.accounts[account_id], {
+            "first_name": "John", "last_name": "Doe", "age": 30, "state": "California",
+            "job": "Employed", "account_type": "Checking", "balance": 500.0})
 
     def test_delete_account(self):
-        account_id = self.bank.create_account(
-            "Jane", "Doe", 25, "New York", "Unemployed", "Savings", 1000.0)
+        account_id = self.bank.create_account(*_JANE)
         self.bank.delete_account(account_id)
         self.assertNotIn(account_id, self.bank.accounts)
 
+    def test_deleted_account_no_longer_reaches_the_bank(self):
+        account = self.bank.get_account(self.bank.create_account(*_JANE))
+        self.bank.delete_account(account.account_id)
+        self.assertIsNone(account._bank)
+        account.deposit(50.0)
+        self.bank.flush()
+        self.assertFalse(self.bank._dirty)
+        # An account changed and then deleted before the next flush.
+        other = self.bank.get_account(self.bank.create_account(*_BOB))
+        other.deposit(25.0)
+        self.bank.delete_account(other.account_id, flush=False)
+        self.assertFalse(self.bank._dirty)
+        self.bank.flush()
+        self.bank.close()
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_delete_account_without_flush(self, mock_file, mock_replace):
+        account_id = self.bank.create_account(*_JANE, flush=False)
+        self.bank.delete_account(account_id, flush=False)
+        self.assertNotIn(account_id, self.bank.accounts)
+        mock_file.assert_not_called()
+        self.bank.flush()
+        mock_file.assert_called_once_with(EXPORT_TEMP_PATH, "wb")
+        mock_replace.assert_called_once_with(EXPORT_TEMP_PATH, "accounts_dataset.csv")
+
     def test_get_account(self):
-        account_id = self.bank.create_account(
-            "Alice", "Smith", 40, "Texas", "Employed", "Checking", 2000.0)
-        account = self.bank.get_account(account_id)
-        self.assertEqual(account.first_name, "Alice")
-        self.assertEqual(account.last_name, "Smith")
-        self.assertEqual(account.age, 40)
-        self.assertEqual(account.state, "Texas")
-        self.assertEqual(account.job, "Employed")
-        self.assertEqual(account.account_type, "Checking")
-        self.assertEqual(account.balance, 2000.0)
+        account_id = self.bank.create_account(*_ALICE)
+        self.assertAccountHas(self.bank.get_account(account_id), {
+            "first_name": "Alice", "last_name": "Smith", "age": 40, "state": "Texas",
+            "job": "Employed", "account_type": "Checking", "balance": 2000.0})
 
     def test_update_account_info(self):
-        account_id = self.bank.create_account(
-            "Bob", "Brown", 50, "Florida", "Employed", "Savings", 3000.0)
+        account_id = self.bank.create_account(*_BOB)
         account = self.bank.get_account(account_id)
         account.update_info(first_name="Robert",
                             last_name="Brownie", age=55, state="Georgia")
-        updated_account = self.bank.get_account(account_id)
-        self.assertEqual(updated_account.first_name, "Robert")
-        self.assertEqual(updated_account.last_name, "Brownie")
-        self.assertEqual(updated_account.age, 55)
-        self.assertEqual(updated_account.state, "Georgia")
-
-    def test_delete_nonexistent_account(self):
-        with self.assertRaises(ValueError):
-            self.bank.delete_account("nonexistent_id")
+        self.assertAccountHas(self.bank.get_account(account_id), {
+            "first_name": "Robert", "last_name": "Brownie", "age": 55, "state": "Georgia"})
+        self.bank.close()
+        self.assertFalse(os.path.exists("balances.log"))
 
-    def test_get_nonexistent_account(self):
-        with self.assertRaises(ValueError):
-            self.bank.get_account("nonexistent_id")
+    def test_update_account_info_reads_answers_from_ask(self):
+        account_id = self.bank.create_account(*_BOB)
+        answers = iter([account_id, "3", "51"])
+        self.bank.update_account_info(ask=lambda prompt: next(answers))
+        self.assertEqual(self.bank.get_account(account_id).age, 51)
 
     def test_list_accounts(self):
         self.bank.create_account("Charlie", "Johnson",
@@ -65,31 +120,261 @@ class TestBank(unittest.TestCase):
         self.bank.create_account(
             "Diana", "Williams", 35, "Ohio", "Employed", "Savings", 1500.0)
         self.assertEqual(len(self.bank.accounts), 2)
+        with patch('builtins.print') as mock_print:
+            self.bank.list_accounts()
+        mock_print.assert_called_once()
+        lines = mock_print.call_args.args[0].split("\n")
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Name: Charlie Johnson", lines[0])
+        self.assertIn("Balance: $1500.00", lines[1])
 
-    @patch('builtins.open', new_callable=mock_open)
-    def test_export_accounts_to_csv(self, mock_file):
+    def test_export_accounts_to_csv(self):
         self.bank.create_account(
             "Eve", "Davis", 45, "Washington", "Employed", "Checking", 2500.0)
-        self.bank.export_accounts_to_csv()
-        mock_file.assert_called_with("accounts.csv", "w", newline='')
-        handle = mock_file()
-        handle.write.assert_called()
-        rows = handle.write.call_args_list
-        self.assertIn('Eve', str(rows))
-        self.assertIn('Davis', str(rows))
-        self.assertIn('45', str(rows))
+        # An in-memory file records the export far more cheaply than a
+        # mock_open handle tracking every write call.
+        csvfile = _InMemoryFile()
+        with patch('builtins.open', return_value=csvfile) as mock_file, \
+                patch('banking_system_components.bank.os.replace') as mock_replace:
+            self.bank.export_accounts_to_csv()
+        mock_file.assert_called_once_with(EXPORT_TEMP_PATH, "wb")
+        mock_replace.assert_called_once_with(EXPORT_TEMP_PATH, "accounts_dataset.csv")
+        self.assertIn(b",Eve,Davis,45,Washington,Employed,Checking,000002500.00\r\n",
+                      csvfile.getvalue())
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('banking_system_components.bank.os.fsync')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_flush(self, mock_file, mock_fsync, mock_replace):
+        account_id = self.bank.create_account(
+            "Frank", "Miller", 33, "Oregon", "Employed", "Savings", 800.0)
+        full_export = call(EXPORT_TEMP_PATH, "wb")
+        in_place = call("accounts_dataset.csv", "r+b")
+        self.bank.flush()
+        self.assertEqual(mock_file.call_args_list, [full_export])
+        mock_fsync.assert_not_called()
+        account = self.bank.get_account(account_id)
+        account.withdraw(300.0)
+        mock_file().write.assert_called_with(f"{account_id},500.00\n".encode())
+        self.bank.flush()
+        self.assertEqual(mock_file.call_args_list.count(in_place), 1)
+        mock_file().write.assert_called_with(b"000000500.00")
+        mock_file().truncate.assert_called_once_with(0)
+        # The patched CSV reaches disk before the journal is truncated.
+        mock_fsync.assert_called_once()
+        self.bank.flush()
+        self.assertEqual(mock_file.call_args_list.count(in_place), 1)
+        # Later in-place flushes reuse the open file.
+        account.deposit(25.0)
+        self.bank.flush()
+        self.assertEqual(mock_file.call_args_list.count(in_place), 1)
+        mock_file().write.assert_called_with(b"000000525.00")
+        account.update_info(job="Retired")
+        self.bank.flush()
+        self.assertEqual(mock_file.call_args_list.count(full_export), 2)
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_transfer_journals_both_sides_together(self, mock_file, mock_replace):
+        source = self.bank.get_account(self.bank.create_account(
+            "Hal", "Jordan", 35, "Texas", "Employed", "Checking", 900.0))
+        target = self.bank.get_account(self.bank.create_account(
+            "Kim", "Possible", 22, "Ohio", "Employed", "Savings", 100.0))
+        source.transfer(target, 400.0)
+        mock_file().write.assert_called_with(
+            f"{source.account_id},500.00\n{target.account_id},500.00\n".encode())
+        self.assertEqual(self.bank._dirty, {source.account_id, target.account_id})
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('banking_system_components.bank.os.fsync')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_journal_sync_interval(self, mock_file, mock_fsync, mock_replace):
+        account = self.bank.get_account(self.bank.create_account(
+            "Grace", "Hopper", 40, "Virginia", "Employed", "Checking", 0.0))
+        for _ in range(JOURNAL_SYNC_INTERVAL - 1):
+            account.deposit(1.0)
+        mock_fsync.assert_not_called()
+        account.deposit(1.0)
+        # The balance journal and the transaction log are synced together.
+        self.assertEqual(mock_fsync.call_count, 2)
+        account.deposit(1.0)
+        self.bank.sync()
+        self.assertEqual(mock_fsync.call_count, 4)
+        self.bank.sync()
+        self.assertEqual(mock_fsync.call_count, 4)
+
+    @patch('banking_system_components.bank.os.replace')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_log_transaction(self, mock_file, mock_replace):
+        source = self.bank.get_account(self.bank.create_account(
+            "Ida", "Wells", 45, "Illinois", "Employed", "Checking", 250.0))
+        target = self.bank.get_account(self.bank.create_account(
+            "Jack", "London", 40, "California", "Employed", "Savings", 0.0))
+        mock_file.reset_mock()
+        source.transfer(target, 100.0)
+        mock_file.assert_any_call("transactions.log", "ab", buffering=64 * 1024)
+        out_id, in_id = (t["transaction_id"] for t in (
+            next(source.get_transaction_history()), next(target.get_transaction_history())))
+        logged = [c.args[0] for c in mock_file().write.call_args_list[:2]]
+        self.assertEqual(logged, [
+            f"{out_id},{source.account_id},Transfer Out,100.00,{target.account_id}\n".encode(),
+            f"{in_id},{target.account_id},Transfer In,100.00,{source.account_id}\n".encode()])
+
+    def test_clear_transaction_log(self):
+        self.bank.clear_transaction_log()
+        account = self.bank.get_account(self.bank.create_account(*_JANE))
+        account.deposit(50.0)
+        self.bank.sync()
+        self.assertTrue(os.path.exists("transactions.log"))
+        self.bank.clear_transaction_log()
+        self.assertFalse(os.path.exists("transactions.log"))
+        account.deposit(25.0)
+        self.bank.close()
+        with open("transactions.log", "rb") as log:
+            self.assertEqual(len(log.readlines()), 1)
+
+    @patch('banking_system_components.bank.EXPORT_CHUNK_SIZE', 2)
+    def test_export_accounts_to_csv_in_chunks(self):
+        for name in ("Ann", "Ben", "Cal", "Dot", "Eli"):
+            self.bank.create_account(
+                name, "Lee", 30, "Utah", "Employed", "Checking", 100.0, flush=False)
+        with patch('builtins.open', new_callable=mock_open) as mock_file, \
+                patch('banking_system_components.bank.os.replace'):
+            self.bank.export_accounts_to_csv()
+        writes = [c.args[0] for c in mock_file().write.call_args_list]
+        self.assertEqual(len(writes), 4)  # header + three chunks
+        exported = b"".join(writes)
+        self.assertEqual(exported.count(b"\r\n"), 6)
+        for account_id, offset in self.bank._balance_offsets.items():
+            self.assertEqual(exported[offset:offset + 12], b"000000100.00")
+
+    def test_load_accounts_from_csv(self):
+        self.assertFalse(self.bank.load_accounts_from_csv())
+        account_id = self.bank.create_account(
+            "Lena", "Ortiz", 29, "New Mexico", "Employed", "Savings", 1200.0)
+        other_id = self.bank.create_account(
+            "Mark", "Twain", 74, "Missouri", "Retired", "Checking", 50.0)
+        # A previous run stopped before flushing, mid-way through a journal entry.
+        with open("balances.log", "wb") as journal:
+            journal.write(f"{account_id},1500.00\n{other_id},9".encode())
+
+        restored = Bank()
+        self.assertTrue(restored.load_accounts_from_csv())
+        self.assertEqual(len(restored.accounts), 2)
+        account = restored.get_account(account_id)
+        self.assertEqual(account.balance, 1500.0)
+        self.assertEqual(account.state, "New Mexico")
+        self.assertEqual(restored.get_account(other_id).balance, 50.0)
+        self.assertFalse(restored._dirty)
+        self.assertEqual(os.path.getsize("balances.log"), 0)
+
+        account.withdraw(500.0)
+        with patch.object(restored, 'export_accounts_to_csv') as full_export:
+            restored.flush()
+        full_export.assert_not_called()
+        restored.close()
+        self.assertFalse(os.path.exists("balances.log"))
+        reloaded = Bank()
+        self.assertTrue(reloaded.load_accounts_from_csv())
+        self.assertEqual(reloaded.get_account(account_id).balance, 1000.0)
+
+    def test_load_accounts_from_broken_csv(self):
+        header = b"account_id,first_name,last_name,age,state,job,account_type,balance\r\n"
+        row = b"abc,Ann,Lee,30,Utah,Employed,Checking,000000100.00\r\n"
+        for content in (b"", header):
+            with open("accounts_dataset.csv", "wb") as csvfile:
+                csvfile.write(content)
+            with patch('builtins.print') as mock_print:
+                self.assertFalse(self.bank.load_accounts_from_csv())
+            mock_print.assert_not_called()
+            self.assertFalse(os.path.exists(UNREADABLE_CSV_PATH))
+        broken = {
+            "truncated row": header + row + b"abd,Bo,Lee,3",
+            "bad age": header + row.replace(b",30,", b",old,"),
+            "bad account type": header + row.replace(b"Checking", b"Brokerage"),
+            "bad balance": header + row.replace(b"000000100.00", b"nan"),
+            "bad header": row + row,
+        }
+        for problem, content in broken.items():
+            with self.subTest(problem):
+                with open("accounts_dataset.csv", "wb") as csvfile:
+                    csvfile.write(content)
+                with patch('builtins.print') as mock_print:
+                    self.assertFalse(self.bank.load_accounts_from_csv())
+                self.assertTrue(mock_print.call_args.args[0].startswith(
+                    "Could not load accounts_dataset.csv"))
+                self.assertFalse(os.path.exists("accounts_dataset.csv"))
+                with open(UNREADABLE_CSV_PATH, "rb") as moved:
+                    self.assertEqual(moved.read(), content)
+        self.assertEqual(self.bank.accounts, {})
+        # Blank lines are not rows, so they do not make the file unreadable.
+        with open("accounts_dataset.csv", "wb") as csvfile:
+            csvfile.write(header + b"\r\n" + row + b"\r\n")
+        self.assertTrue(self.bank.load_accounts_from_csv())
+        self.assertEqual(list(self.bank.accounts), ["abc"])
+        self.assertEqual(self.bank._balance_offsets["abc"], len(header) + 2 + len(row) - 14)
+
+    def test_load_accounts_with_broken_journal(self):
+        account_id = self.bank.create_account(*_ALICE)
+        other_id = self.bank.create_account(*_BOB)
+        journal = (f"{account_id},1500.00\n{other_id},abc\n\xff\xfe,1.00\n"
+                   f"{other_id},nan\n{other_id},75.00\n").encode("latin-1")
+        with open("balances.log", "wb") as log:
+            log.write(journal)
+
+        restored = Bank()
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(restored.load_accounts_from_csv())
+        self.assertEqual(
+            mock_print.call_args.args[0],
+            f"Skipped 3 unreadable entries in balances.log. A copy was kept as {UNREADABLE_JOURNAL_PATH}.")
+        self.assertEqual(restored.get_account(account_id).balance, 1500.0)
+        self.assertEqual(restored.get_account(other_id).balance, 75.0)
+        with open(UNREADABLE_JOURNAL_PATH, "rb") as copy:
+            self.assertEqual(copy.read(), journal)
+        restored.close()
+
+    def test_interrupted_export_keeps_previous_csv(self):
+        self.bank.create_account(*_ALICE)
+        with open("accounts_dataset.csv", "rb") as csvfile:
+            saved = csvfile.read()
+        self.bank.create_account(*_BOB, flush=False)
+        with patch('banking_system_components.bank.format_balance', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            self.bank.export_accounts_to_csv()
+        with open("accounts_dataset.csv", "rb") as csvfile:
+            self.assertEqual(csvfile.read(), saved)
 
+    @patch('banking_system_components.bank.SEED_FIRST_NAMES', ("Ann",))
+    @patch('banking_system_components.bank.SEED_LAST_NAMES', ("Lee",))
+    @patch('banking_system_components.bank.SEED_STATES', ("Utah",))
+    @patch('banking_system_components.bank.SEED_AGES', (30,))
+    @patch('banking_system_components.bank.SEED_JOBS', ("Employed",))
     def test_load_initial_accounts(self):
-        with patch('banking_system_components.bank.Bank.create_account') as mocked_create_account:
+        with patch('banking_system_components.bank.Bank.create_account') as mocked_create_account, \
+                patch('banking_system_components.bank.Bank.export_accounts_to_csv'):
             self.bank.load_initial_accounts()
             self.assertEqual(mocked_create_account.call_count, 20)
+            for i, args in enumerate(mocked_create_account.call_args_list):
+                account_type = "Checking" if i % 2 == 0 else "Savings"
+                self.assertEqual(args.args[:6], ("Ann", "Lee", 30, "Utah", "Employed", account_type))
+                self.assertTrue(100.0 <= args.args[6] <= 10000.0)
+                self.assertFalse(args.kwargs["flush"])
+        with patch('banking_system_components.bank.Bank.export_accounts_to_csv') as mocked_export, \
+                patch('builtins.print'):
+            self.bank.load_initial_accounts(count=100)
+        mocked_export.assert_called_once()
+        self.assertEqual(len(self.bank.accounts), 100)
 
-    def test_zzz_delete_csv(self):
-        """ Cleaning up the CSV file after all tests are run. As unittest runs tests in alphabetical order, the function is named that way to ensure it runs last."""
-        self.bank.delete_account_csv()
-        with self.assertRaises(FileNotFoundError):
-            with open("accounts.csv", "r"):
-                pass
+    @patch('banking_system_components.bank.os.remove')
+    def test_delete_account_csv(self, mock_remove):
+        with patch('builtins.print') as mock_print:
+            self.bank.delete_account_csv()
+            mock_remove.assert_called_once_with("accounts_dataset.csv")
+            mock_print.assert_called_with("Accounts CSV file deleted.")
+            mock_remove.side_effect = FileNotFoundError
+            self.bank.delete_account_csv()
+            mock_print.assert_called_with("Accounts CSV file not found.")
 
 
 if __name__ == '__main__':
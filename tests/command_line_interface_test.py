@@ -0,0 +1,212 @@
+import os
+import tempfile
+import unittest
+from collections import deque
+from unittest.mock import patch
+
+from banking_system_components.command_line_interface import BankCLI
+
+class TestBankCLI(unittest.TestCase):
+
+    def setUp(self):
+        # The CLI saves its accounts in the working directory, so each test
+        # gets a fresh one.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        with patch('banking_system_components.command_line_interface.atexit.register'), \
+                patch('builtins.print'):
+            self.cli = BankCLI()
+            self.account_id = self.cli.bank.create_account(
+                "Ann", "Lee", 30, "Utah", "Employed", "Checking", 100.0)
+        self.addCleanup(self.cli.bank.close)
+
+    def run_commands(self, *lines):
+        """Run command lines through run_batch and return what they printed."""
+        with patch('builtins.print') as mock_print:
+            self.cli.run_batch(lines)
+        return [c.args[0] for c in mock_print.call_args_list]
+
+    def test_ask_reads_batch_answers_in_order(self):
+        with patch('builtins.input', return_value="typed") as mock_input:
+            self.assertEqual(self.cli._ask("Prompt: "), "typed")
+            mock_input.assert_called_once_with("Prompt: ")
+            self.cli._batch_answers = deque(["first", "second"])
+            self.assertEqual(
+                [self.cli._ask("Prompt: ") for _ in range(3)], ["first", "second", ""])
+            mock_input.assert_called_once()
+
+    def test_run_batch(self):
+        account = self.cli.bank.get_account(self.account_id)
+        with patch.object(self.cli.bank, 'flush') as mock_flush:
+            printed = self.run_commands(
+                "# comment lines and blank lines are skipped",
+                "",
+                f"1 {self.account_id} 50",
+                f"2 {self.account_id} 20 # trailing comment",
+                "99",
+                "12",
+                f"1 {self.account_id} 1000")
+        self.assertEqual(printed, [
+            f"Deposited $50.00 into account {self.account_id}. New balance: $150.00",
+            f"Withdrew $20.00 from account {self.account_id}. New balance: $130.00",
+            "Invalid option: 99"])
+        self.assertEqual(account.balance, 130.0)
+        self.assertIsNone(self.cli._batch_answers)
+        mock_flush.assert_called_once()
+
+    def test_run_batch_continues_after_bad_lines(self):
+        with patch.object(self.cli.bank, 'flush') as mock_flush:
+            printed = self.run_commands(
+                "6 Jane O'Brien 40 Utah Employed Savings 10",
+                "6 Jane Doe 40 Utah Employed Brokerage 10",
+                f"1 {self.account_id} 5")
+        self.assertTrue(printed[0].startswith("Invalid command: 6 Jane O'Brien"))
+        self.assertIn("No closing quotation", printed[0])
+        self.assertEqual(
+            printed[1], "Invalid input. Account type must be either 'Checking' or 'Savings'.")
+        self.assertEqual(self.cli.bank.get_account(self.account_id).balance, 105.0)
+        mock_flush.assert_called_once()
+
+    def test_run_batch_continues_after_os_errors(self):
+        missing = os.path.join("missing", "history.csv")
+        with patch.dict(self.cli._actions, {"99": lambda: open(missing)}):
+            printed = self.run_commands(
+                f"1 {self.account_id} 5",
+                f"10 {self.account_id} {missing}",
+                "99",
+                f"1 {self.account_id} 5")
+        self.assertTrue(printed[1].startswith("Could not export transaction history: "))
+        self.assertIsInstance(printed[2], FileNotFoundError)
+        self.assertEqual(self.cli.bank.get_account(self.account_id).balance, 110.0)
+
+    def test_run_batch_reports_failing_commands(self):
+        failing = patch.dict(self.cli._actions, {"1": lambda: self.cli.bank.get_account("nope")})
+        with failing:
+            printed = self.run_commands("1", f"2 {self.account_id} 5")
+        self.assertEqual(str(printed[0]), "Account not found.")
+        self.assertIsNone(self.cli._batch_answers)
+        self.assertEqual(self.cli.bank.get_account(self.account_id).balance, 95.0)
+
+    def test_starts_with_new_accounts_when_csv_is_broken(self):
+        self.run_commands(f"1 {self.account_id} 50")
+        self.cli.bank.close()
+        with open("transactions.log", "rb") as log:
+            logged = log.read()
+        with open("accounts_dataset.csv", "ab") as csvfile:
+            csvfile.write(b"abc,Bo,Lee,3")
+        with patch('banking_system_components.command_line_interface.atexit.register'), \
+                patch('builtins.print') as mock_print:
+            cli = BankCLI()
+        self.addCleanup(cli.bank.close)
+        self.assertIn("Could not load accounts_dataset.csv", mock_print.call_args_list[0].args[0])
+        self.assertEqual(len(cli.bank.accounts), 20)
+        self.assertTrue(os.path.exists("accounts_dataset.csv.bad"))
+        # The audit log of the unreadable accounts is kept alongside them.
+        self.assertFalse(os.path.exists("transactions.log"))
+        with open("transactions.log.bad", "rb") as log:
+            self.assertEqual(log.read(), logged)
+
+    def test_reset_discards_transaction_log(self):
+        self.run_commands(f"1 {self.account_id} 50")
+        self.cli.bank.close()
+        with patch('banking_system_components.command_line_interface.atexit.register'), \
+                patch('builtins.print'):
+            cli = BankCLI()
+            self.assertTrue(os.path.exists("transactions.log"))
+            cli = BankCLI(reset=True)
+        self.addCleanup(cli.bank.close)
+        self.assertFalse(os.path.exists("transactions.log"))
+        self.assertNotIn(self.account_id, cli.bank.accounts)
+
+    def test_first_run_discards_transaction_log(self):
+        self.run_commands(f"1 {self.account_id} 50")
+        self.cli.bank.close()
+        os.remove("accounts_dataset.csv")
+        with patch('banking_system_components.command_line_interface.atexit.register'), \
+                patch('builtins.print'):
+            cli = BankCLI()
+        self.addCleanup(cli.bank.close)
+        self.assertFalse(os.path.exists("transactions.log"))
+
+    def test_messages_show_amounts_applied(self):
+        other_id = self.cli.bank.create_account(
+            "Bo", "Lee", 40, "Utah", "Employed", "Savings", 0.0)
+        printed = self.run_commands(
+            f"1 {self.account_id} 0.015",
+            f"2 {self.account_id} 0.025",
+            f"3 {self.account_id} {other_id} 0.075")
+        self.assertEqual(printed, [
+            f"Deposited $0.02 into account {self.account_id}. New balance: $100.02",
+            f"Withdrew $0.02 from account {self.account_id}. New balance: $100.00",
+            f"Transferred $0.08 from account {self.account_id} to {other_id}."])
+
+    def test_read_float(self):
+        self.cli._batch_answers = deque(["12.5", "abc", ""])
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(self.cli._read_float("Amount: "), 12.5)
+            mock_print.assert_not_called()
+            self.assertIsNone(self.cli._read_float("Amount: "))
+            self.assertIsNone(self.cli._read_float("Amount: "))
+        self.assertEqual(
+            [c.args[0] for c in mock_print.call_args_list],
+            ["Invalid input. Amount must be a number."] * 2)
+
+    def test_bad_amounts_are_reported(self):
+        printed = self.run_commands(
+            f"1 {self.account_id} ten",
+            f"2 {self.account_id} ''",
+            f"3 {self.account_id} {self.account_id} 1,000")
+        self.assertEqual(printed, ["Invalid input. Amount must be a number."] * 3)
+        self.assertEqual(self.cli.bank.get_account(self.account_id).transaction_count, 0)
+
+    def test_export_transaction_history(self):
+        other_id = self.cli.bank.create_account(
+            "Bo", "Lee", 40, "Utah", "Employed", "Savings", 0.0)
+        printed = self.run_commands(
+            f"1 {self.account_id} 50",
+            f"3 {self.account_id} {other_id} 30",
+            f"10 {self.account_id} history.csv")
+        self.assertEqual(printed[-1], "Transaction history exported to history.csv.")
+        account = self.cli.bank.get_account(self.account_id)
+        deposit_id, transfer_id = (
+            t["transaction_id"] for t in account.get_transaction_history())
+        with open("history.csv", newline="") as exported:
+            self.assertEqual(exported.read(), (
+                "type,amount,target_account,transaction_id\r\n"
+                f"Deposit,50.0,,{deposit_id}\r\n"
+                f"Transfer Out,30.0,{other_id},{transfer_id}\r\n"))
+
+    def test_export_transaction_history_without_transactions(self):
+        printed = self.run_commands(f"10 {self.account_id} history.csv", "10 nope")
+        self.assertEqual(printed[0], "No transactions to export.")
+        self.assertEqual(str(printed[1]), "Account not found.")
+        self.assertFalse(os.path.exists("history.csv"))
+
+    def test_non_finite_amounts_are_rejected(self):
+        printed = self.run_commands(
+            f"1 {self.account_id} inf",
+            f"2 {self.account_id} nan",
+            f"3 {self.account_id} {self.account_id} 1e400")
+        self.assertEqual(printed, ["Invalid input. Amount must be a number."] * 3)
+        # Finite amounts too large to convert to cents are refused by the account.
+        printed = self.run_commands(
+            f"1 {self.account_id} 1e307",
+            f"2 {self.account_id} -1e307",
+            f"3 {self.account_id} {self.account_id} 1e307")
+        self.assertEqual(list(map(str, printed)), ["Amount must be a finite number."] * 3)
+        self.assertEqual(self.cli.bank.get_account(self.account_id).balance, 100.0)
+
+    def test_create_account_rejects_non_finite_balance(self):
+        count = len(self.cli.bank.accounts)
+        for balance in ("nan", "inf", "1e400"):
+            printed = self.run_commands(f"6 Bo Lee 40 Utah Employed Savings {balance}")
+            self.assertEqual(printed, ["Invalid input. Initial balance must be a number."])
+        printed = self.run_commands("6 Bo Lee 40 Utah Employed Savings 1e307")
+        self.assertEqual(list(map(str, printed)), ["Amount must be a finite number."])
+        self.assertEqual(len(self.cli.bank.accounts), count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from banking_system_components.formatting import BALANCE_WIDTH, format_balance, format_money
+
+
+class TestFormatting(unittest.TestCase):
+    def test_format_money(self):
+        """Test that amounts are formatted with two decimal places."""
+        self.assertEqual(format_money(1500.0), "1500.00")
+        self.assertEqual(format_money(1234.5), "1234.50")
+        self.assertEqual(format_money(42), "42.00")
+
+    def test_format_money_is_cached(self):
+        """Test that repeated amounts are served from the cache."""
+        format_money.cache_clear()
+        format_money(250.0)
+        format_money(250.0)
+        info = format_money.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_format_balance(self):
+        """Test that balances are zero-padded to a fixed width."""
+        self.assertEqual(format_balance(1500.0), "000001500.00")
+        self.assertEqual(format_balance(0.5), "000000000.50")
+        self.assertEqual(len(format_balance(123456789.99)), BALANCE_WIDTH)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,37 +1,49 @@
+import re
 import unittest
 from banking_system_components.transaction import Transaction
 
+# Transaction IDs are exactly 32 lowercase hex digits.
+HEX_ID = re.compile(r"\A[0-9a-f]{32}\Z")
+
 
 class TestTransaction(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Build the read-only transactions shared by the tests."""
+        cls.deposit = Transaction(transaction_type="Deposit", amount=150.0)
+        cls.transfer = Transaction(
+            transaction_type="Transfer In", amount=200.0, target_account='123abc')
+        cls.withdrawal = Transaction(transaction_type="Withdrawal", amount=100.0)
+        cls.expected_withdrawal_dict = {
+            "type": "Withdrawal",
+            "amount": 100.0,
+            "target_account": None,
+            "transaction_id": cls.withdrawal.transaction_id
+        }
+
     def test_transaction_initialization(self):
         """Test that a Transaction object initializes correctly."""
-        transaction = Transaction(transaction_type="Deposit", amount=150.0)
+        transaction = self.deposit
         self.assertEqual(transaction.transaction_type, "Deposit")
         self.assertEqual(transaction.amount, 150.0)
         self.assertIsNone(transaction.target_account)
-        self.assertTrue(isinstance(transaction.transaction_id, str))
-        self.assertEqual(len(transaction.transaction_id),
-                         32)  # UUID hex is 32 chars long
+        self.assertRegex(transaction.transaction_id, HEX_ID)
 
     def test_transaction_initialization_with_target_account(self):
         """Test initializing with a target account."""
-        transaction = Transaction(
-            transaction_type="Transfer In", amount=200.0, target_account='123abc')
+        transaction = self.transfer
         self.assertEqual(transaction.transaction_type, "Transfer In")
         self.assertEqual(transaction.amount, 200.0)
         self.assertEqual(transaction.target_account, '123abc')
 
+    def test_transaction_ids_are_unique(self):
+        """Test that each new transaction gets a distinct ID."""
+        ids = {t.transaction_id for t in (self.deposit, self.transfer, self.withdrawal)}
+        self.assertEqual(len(ids), 3)
+
     def test_to_dict(self):
         """Test the to_dict method for accurate dictionary representation."""
-        transaction = Transaction(transaction_type="Withdrawal", amount=100.0)
-        transaction_dict = transaction.to_dict()
-        expected_dict = {
-            "type": "Withdrawal",
-            "amount": 100.0,
-            "target_account": None,
-            "transaction_id": transaction.transaction_id
-        }
-        self.assertEqual(transaction_dict, expected_dict)
+        self.assertEqual(self.withdrawal.to_dict(), self.expected_withdrawal_dict)
 
 
 if __name__ == '__main__':